@@ -4,23 +4,33 @@ from __future__ import annotations
 import json
 import os
 import re
+import textwrap
 import time
 import unicodedata
 import urllib.request
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from functools import lru_cache, partial
 from pathlib import Path
-from typing import Dict, Iterable, List, Sequence, Tuple, Union
+from typing import (BinaryIO, Dict, Iterable, Iterator, List, Sequence,
+                    Tuple, Union)
 
 import matplotlib
 matplotlib.use("Agg")  # non-interactive backend
 import matplotlib.pyplot as plt
+from matplotlib import font_manager
 import nltk
-from nltk.corpus import stopwords
+from nltk.corpus import stopwords, wordnet
 from nltk.stem import WordNetLemmatizer
-from nltk.tokenize import word_tokenize
+from PIL import Image, ImageDraw, ImageFont
 from wordcloud import WordCloud
 
+try:  # optional (pip install ijson): stream JSON arrays instead of loading them whole
+    import ijson
+except ImportError:  # fall back to json.load
+    ijson = None
+
 
 # ----------------------------- Config Models ----------------------------- #
 
@@ -50,7 +60,6 @@ class WordCloudConfig:
 def ensure_nltk() -> None:
     """WHY: Needed resources; WHAT: check/download once."""
     required = [
-        ("punkt", "tokenizers"),
         ("stopwords", "corpora"),
         ("wordnet", "corpora"),
         ("omw-1.4", "corpora"),
@@ -70,17 +79,34 @@ def _read_text_from_url(url: str) -> str:
         return resp.read().decode("utf-8")
 
 
+def _iter_texts(fh: BinaryIO) -> Iterator[str]:
+    """WHY: O(one object) memory; WHAT: stream 'text' fields via ijson."""
+    if fh.peek(64).lstrip()[:1] != b"[":
+        raise ValueError("Expected a JSON array of paragraph objects.")
+    for obj in ijson.items(fh, "item"):
+        yield str(obj.get("text", ""))
+
+
 def load_json_texts(src: Union[Path, str]) -> str:
     """
     WHY: Allow local paths *or* GitHub RAW URLs without changing callers.
     WHAT: Loads a JSON array of objects and concatenates 'text' fields.
+    Streams with ijson when installed; otherwise parses with json.
     """
-    if isinstance(src, str) and src.startswith(("http://", "https://")):
-        data = json.loads(_read_text_from_url(src))
-    else:
+    is_url = isinstance(src, str) and src.startswith(("http://", "https://"))
+    if not is_url:
         p = Path(src)
         if not p.exists():
             raise FileNotFoundError(f"Missing file: {p}")
+
+    if ijson is not None:
+        opened = urllib.request.urlopen(src) if is_url else p.open("rb")
+        with opened as fh:
+            return " ".join(_iter_texts(fh))
+
+    if is_url:
+        data = json.loads(_read_text_from_url(src))
+    else:
         with p.open("r", encoding="utf-8") as fh:
             data = json.load(fh)
 
@@ -91,6 +117,20 @@ def load_json_texts(src: Union[Path, str]) -> str:
 
 # ---------------------------- Text Preprocessing ------------------------- #
 
+# Word runs containing a letter (not just digits/underscores), optionally
+# joined by '-' or '/'. A '.' joins too unless only digits follow, so 'e.g'
+# and '97.5th' stay whole but footnote markers ('model.52') come off.
+_TOK_RE = re.compile(
+    r"(?:\w+[-/.])*\w*[^\W\d_]\w*(?:[-/]\w+|\.\w*[^\W\d_]\w*)*")
+_SPLIT_RE = re.compile(r"[-/]")
+# word_tokenize split English 'cannot' into the stopwords 'can'/'not'; the
+# regex keeps it whole, so it is dropped with the stopwords instead.
+_ENGLISH_TOKENIZER_STOPS = frozenset({"cannot"})
+# Standalone 'ml'; group 1 captures a trailing hyphen ('ml-based').
+_ML_RE = re.compile(r"\bml\b(-?)", re.IGNORECASE)
+
+_LEM = WordNetLemmatizer()  # stateless; WordNet loads lazily on first use
+
 _DASH_TRANS = {
     ord("\u2010"): ord("-"),
     ord("\u2011"): ord("-"),
@@ -100,62 +140,93 @@ _DASH_TRANS = {
     ord("\u2212"): ord("-"),
 }
 
+# Drop every Unicode combining mark and fold dashes in one C-level pass.
+_STRIP_COMBINING = {
+    c: None for c in range(0x110000) if unicodedata.combining(chr(c))
+}
+_TRANS = {**_STRIP_COMBINING, **_DASH_TRANS}
+
 def normalize_text(text: str) -> str:
-    """WHY: Stable tokens; WHAT: lower, strip accents, normalize dashes."""
+    """
+    WHY: Stable tokens; WHAT: lower, strip accents, normalize dashes.
+    NFKD (not NFKC) so accents decompose into strippable marks. This is the
+    pipeline's only lowercasing; downstream steps expect lowercased tokens.
+    """
     if not isinstance(text, str):
         raise TypeError("text must be a str")
-    s = unicodedata.normalize("NFKD", text).lower()
-    s = "".join(ch for ch in s if not unicodedata.combining(ch))
-    return s.translate(_DASH_TRANS)
-
-def tokenize_expand(text: str, language: str) -> List[str]:
-    """WHY: Catch 'ml' in 'ml-based'/'ml/ai'; WHAT: tokenize + split -/."""
-    tokens = word_tokenize(text, language=language)
-    tokens = [t for t in tokens if any(c.isalpha() for c in t)]
+    return unicodedata.normalize("NFKD", text).lower().translate(_TRANS)
+
+def tokenize_expand(text: str) -> List[str]:
+    """WHY: Catch 'ml' in 'ml-based'/'ml/ai'; WHAT: regex tokenize + split -/."""
     parts: List[str] = []
-    split_re = re.compile(r"[-/]")
-    for tok in tokens:
-        parts.extend(split_re.split(tok))
-    return [p for p in parts if p]
-
-def remove_stop_words(
-    tokens: Sequence[str], language: str, extra_stopwords: Iterable[str]
-) -> List[str]:
-    """WHY: Drop closed-class/domain filler; WHAT: NLTK stops ∪ extra."""
-    base = set(stopwords.words(language))
-    extra = {w.lower() for w in extra_stopwords}
-    stop_set = base | extra
-    return [t for t in tokens if t.lower() not in stop_set]
-
-def lemmatize_tokens(tokens: Sequence[str], pos: str) -> List[str]:
-    """WHY: Canonical counts; WHAT: WordNet lemmatization by POS."""
+    for tok in _TOK_RE.findall(text):
+        parts.extend(_SPLIT_RE.split(tok))
+    return parts
+
+@lru_cache(maxsize=8)
+def _stop_set(language: str) -> frozenset:
+    """WHY: Read the NLTK corpus once per language; WHAT: cached stops."""
+    return frozenset(stopwords.words(language))
+
+def build_stop_set(language: str,
+                   extra_stopwords: Iterable[str]) -> frozenset:
+    """WHY: Build once per file; WHAT: NLTK stops ∪ lowercased extras."""
+    stops = _stop_set(language) | {w.lower() for w in extra_stopwords}
+    if language == "english":
+        stops |= _ENGLISH_TOKENIZER_STOPS
+    return stops
+
+@lru_cache(maxsize=None)
+def _lemmatize(token: str, pos: str) -> str:
+    """WHY: Zipfian corpora repeat tokens; WHAT: memoized WordNet lemma."""
+    return _LEM.lemmatize(token, pos=pos)
+
+def tokens_to_freqs(tokens: Iterable[str], stop_set: frozenset, pos: str,
+                    min_len: int) -> Tuple[List[str], Counter]:
+    """
+    WHY: One pass instead of stop -> lemma -> count list copies.
+    WHAT: Drop stops, lemmatize; return (lemmas, length-filtered lemma
+    counts). Lemmas are kept in order for n-grams and ML checks.
+    Tokens must already be lowercased (normalize_text + tokenize_expand).
+    """
     if pos not in {"n", "v", "a", "r"}:
         raise ValueError("pos must be one of {'n','v','a','r'}")
-    lem = WordNetLemmatizer()
-    return [lem.lemmatize(t.lower(), pos=pos) for t in tokens]
-
-def ml_counts(raw_norm_text: str, tokens: Sequence[str]) -> Tuple[int, int, int]:
-    """WHY: Verify ML survival; WHAT: (raw-standalone, raw-hyph, tokens=='ml')."""
-    stand = len(re.findall(r"\bml\b", raw_norm_text, flags=re.IGNORECASE))
-    hyph = len(re.findall(r"\bml\-", raw_norm_text, flags=re.IGNORECASE))
-    in_tokens = sum(1 for t in tokens if t == "ml")
-    return stand, hyph, in_tokens
-
-def build_freqs(tokens: Sequence[str], min_len: int) -> Dict[str, int]:
-    """WHY: WordCloud input; WHAT: filter by length and count."""
     if min_len < 1:
         raise ValueError("min_len must be >= 1")
-    filtered = [t for t in tokens if len(t) >= min_len]
-    return dict(Counter(filtered))
+    lemmas: List[str] = []
+    freqs: Counter = Counter()
+    for t in tokens:
+        if t in stop_set:
+            continue
+        lemma = _lemmatize(t, pos)
+        lemmas.append(lemma)
+        if len(lemma) >= min_len:
+            freqs[lemma] += 1
+    return lemmas, freqs
+
+def ml_counts(raw_norm_text: str,
+              tokens: Sequence[str]) -> Tuple[int, int, int]:
+    """WHY: Verify ML survival; WHAT: (raw-standalone, raw-hyph, tokens=='ml')."""
+    stand = hyph = 0
+    for m in _ML_RE.finditer(raw_norm_text):
+        stand += 1
+        if m.group(1):
+            hyph += 1
+    return stand, hyph, tokens.count("ml")
 
 
 # ------------------------------- N-grams --------------------------------- #
 
-def ngrams(tokens: Sequence[str], n: int) -> Counter:
-    """WHY: Collocations; WHAT: Counter of n-gram tuples."""
-    if n < 1:
-        raise ValueError("n must be >= 1")
-    return Counter(tuple(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+def bigrams_trigrams(tokens: Sequence[str]) -> Tuple[Counter, Counter]:
+    """WHY: One walk for both plots; WHAT: (bigram, trigram) Counters."""
+    bi: Counter = Counter()
+    tri: Counter = Counter()
+    for a, b, c in zip(tokens, tokens[1:], tokens[2:]):
+        bi[(a, b)] += 1
+        tri[(a, b, c)] += 1
+    if len(tokens) >= 2:
+        bi[(tokens[-2], tokens[-1])] += 1
+    return bi, tri
 
 def plot_top_ngrams(counts: Counter, top_k: int, title: str,
                     out_path: Path) -> Path:
@@ -202,38 +273,63 @@ def compose_side_by_side(image_paths: Sequence[Path], titles: Sequence[str],
                          out_path: Path) -> Path:
     """
     WHY: Report-friendly compare; WHAT: stitch images + footnote.
-    Fixes layout: constrained_layout + aspect='auto'.
+    Tiles the rendered PNGs with PIL (no matplotlib decode/re-encode).
     """
     if len(image_paths) != len(titles):
         raise ValueError("image_paths and titles must have same length.")
 
-    fig, axes = plt.subplots(
-        1, len(image_paths), figsize=(16, 9), dpi=300,
-        # constrained_layout=True
-    )
-    if len(image_paths) == 1:
-        axes = [axes]
-
-    for ax, img_path, title in zip(axes, image_paths, titles):
-        ax.imshow(plt.imread(img_path), aspect="auto")
-        ax.set_title(title, fontsize=14, pad=10)
-        ax.axis("off")
-
-    fig.suptitle(sup_title, fontsize=22, y=0.995)
-    
-    fig.tight_layout(rect=[0.01, 0.08, 0.99, 0.96])
-    
-    if footnote:
-        fig.text(0.01, 0.02, footnote, ha="left", va="bottom", fontsize=10)
+    font_path = font_manager.findfont("DejaVu Sans")
+    sup_font = ImageFont.truetype(font_path, 56)
+    title_font = ImageFont.truetype(font_path, 36)
+    foot_font = ImageFont.truetype(font_path, 26)
+    pad = 30
+
+    imgs = [Image.open(p).convert("RGB") for p in image_paths]
+    width = sum(im.width for im in imgs)
+    img_h = max(im.height for im in imgs)
+
+    chars = max(1, int((width - 2 * pad) / foot_font.getlength("x")))
+    foot_lines = textwrap.wrap(footnote, chars) if footnote else []
+    foot_line_h = int(foot_font.size * 1.3)
+
+    sup_h = sup_font.size + 2 * pad
+    title_h = title_font.size + pad
+    foot_h = len(foot_lines) * foot_line_h + 2 * pad if foot_lines else 0
+    top = sup_h + title_h
+
+    canvas = Image.new("RGB", (width, top + img_h + foot_h), "white")
+    draw = ImageDraw.Draw(canvas)
+    draw.text((width // 2, pad), sup_title, fill="black", font=sup_font,
+              anchor="mt")
+
+    x = 0
+    for im, title in zip(imgs, titles):
+        draw.text((x + im.width // 2, sup_h), title, fill="black",
+                  font=title_font, anchor="mt")
+        canvas.paste(im, (x, top))
+        x += im.width
+        im.close()
+
+    if foot_lines:
+        draw.multiline_text((pad, top + img_h + pad), "\n".join(foot_lines),
+                            fill="black", font=foot_font,
+                            spacing=foot_line_h - foot_font.size)
 
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    fig.savefig(out_path, dpi=300)
-    plt.close(fig)
+    canvas.save(out_path)
     return out_path
 
 
 # --------------------------------- Main ---------------------------------- #
 
+def _init_worker() -> None:
+    """
+    WHY: WordNet loads lazily, once per process; WHAT: load it at worker
+    start. A parent-side preload only reaches workers under fork; this
+    initializer also covers spawn (Windows/macOS) and forkserver.
+    """
+    wordnet.ensure_loaded()
+
 def process_file(src: Union[Path, str], prep: PreprocessConfig,
                  wc_cfg: WordCloudConfig, out_dir: Path,
                  make_ngram_plots: bool = True) -> Tuple[Path, Dict[str, int]]:
@@ -242,22 +338,23 @@ def process_file(src: Union[Path, str], prep: PreprocessConfig,
     raw = load_json_texts(src)
     norm = normalize_text(raw)
 
-    tokens = tokenize_expand(norm, language=prep.language)
-    tokens = remove_stop_words(tokens, prep.language, prep.extra_stopwords)
-    tokens = lemmatize_tokens(tokens, pos=prep.lemmatizer_pos)
+    stop_set = build_stop_set(prep.language, prep.extra_stopwords)
+    tokens, freqs = tokens_to_freqs(
+        tokenize_expand(norm), stop_set, pos=prep.lemmatizer_pos,
+        min_len=prep.min_token_len,
+    )
 
+    # Count on the lemmas, not freqs: 'ml' is shorter than the usual min_len.
     stand, hyph, ml_tok = ml_counts(norm, tokens)
     print(f"[{src}] ML raw_standalone={stand}, raw_hyphenated={hyph}, "
           f"tokens=='ml'={ml_tok}")
 
-    freqs = build_freqs(tokens, min_len=prep.min_token_len)
-    stem = Path(str(src)).stem
+    stem = os.path.splitext(os.path.basename(str(src).rstrip("/")))[0]
     wc_out = out_dir / f"{stem}_wordcloudv2.png"
     render_wordcloud(freqs, wc_cfg, wc_out)
 
     if make_ngram_plots:
-        bi = ngrams(tokens, 2)
-        tri = ngrams(tokens, 3)
+        bi, tri = bigrams_trigrams(tokens)
         plot_top_ngrams(bi, 20, f"Top 20 Bigrams — {stem}",
                         out_dir / f"{stem}_bigrams_top20v2.png")
         plot_top_ngrams(tri, 20, f"Top 20 Trigrams — {stem}",
@@ -303,21 +400,24 @@ def main() -> None:
         colormap="gist_earth",
     )
 
+    # Sources are independent and CPU-bound: one worker process each.
+    run = partial(process_file, prep=prep, wc_cfg=wc_cfg, out_dir=out_dir,
+                  make_ngram_plots=True)
+    with ProcessPoolExecutor(max_workers=len(json_sources),
+                             initializer=_init_worker) as ex:
+        results = list(ex.map(run, json_sources))
+
     images: List[Path] = []
     titles: List[str] = []
 
-    for src in json_sources:
-        img, stats = process_file(
-            src=src, prep=prep, wc_cfg=wc_cfg, out_dir=out_dir,
-            make_ngram_plots=True,
-        )
+    for src, (img, stats) in zip(json_sources, results):
         images.append(img)
         label = "Jul. 2025 ECB Guide" if "202507" in str(src) else "Feb. 2024 ECB Guide"
         titles.append(label)  # ← no token/vocab/ml stats in the title
 
     foot = (
         "Pre-processing: lowercasing, accent stripping, dash normalization; "
-        f"NLTK tokenization; stopword removal ({prep.language}) + extras "
+        f"regex tokenization; stopword removal ({prep.language}) + extras "
         f"{set(prep.extra_stopwords)}; WordNet pos='{prep.lemmatizer_pos}'; "
         f"min_len≥{prep.min_token_len}; "
     )
@@ -337,12 +437,3 @@ def main() -> None:
 if __name__ == "__main__":
     main()
 
-
-
-for ax, (img_path, title) in zip(axes, rendered):
-    img = plt.imread(img_path)
-    ax.imshow(img)
-    ax.set_title(title, fontsize=14, pad=10)
-    ax.axis("off")
-
-fig.suptitle("Wordcloud comparison of ECB guides to internal models (07/25 vs 02/24)", fontsize=22, y=0.995)
@@ -48,13 +48,22 @@ NUM_SUBTITLE_RE = re.compile(r"^\s*(\d+)\s+[A-Za-z].*")
 HEADER_NUM_RE = re.compile(r"ECB guide to internal models\s+–\s+.*?\s+(\d+)\s*$")
 
 # Strip any leftover header/footer text fragments from blocks
+HEADER_LITERAL = "ECB guide to internal models"  # cheap `in` gate before the regex
 HEADER_STRIP_RE = re.compile(r"ECB guide to internal models\s+–\s+.*?\s+\d+\s*")
 
+# Whitespace runs collapsed to a single space
+WS_RE = re.compile(r"\s+")
+
 # Font-size thresholds (empirically inspected for this PDF)
 TITLE_MIN_PT = 18.0       # e.g., "Foreword", "Overarching principles for internal models"
 SUBTITLE_MIN_PT = 12.5    # e.g., "1 Guidelines at consolidated ...", "2 Documentation ..."
 FOOTNOTE_MAX_PT = 8.5     # footnotes are often ~7–8pt in this document
 
+# Page margins holding the running header/footer (points from top/bottom edge);
+# only blocks lying entirely inside one are skipped
+HEADER_MARGIN_PT = 50.0
+FOOTER_MARGIN_PT = 50.0
+
 # Optional quick table heading filter (best-effort)
 TABLE_HEADING_PREFIXES = ("Table ", "Relevant regulatory references")
 
@@ -66,14 +75,14 @@ def normalize_text(s: str) -> str:
     s = s.replace("\u00ad", "")      # soft hyphen
     s = s.replace("-\n", "")         # hyphenated line break
     s = s.replace("\n", " ")
-    s = HEADER_STRIP_RE.sub(" ", s)  # remove header/footer remnants if any slipped in
-    s = re.sub(r"\s+", " ", s).strip()
+    if HEADER_LITERAL in s:
+        s = HEADER_STRIP_RE.sub(" ", s)  # remove header/footer remnants if any slipped in
+    s = WS_RE.sub(" ", s).strip()
     return s
 
 
-def get_printed_page_number(page: fitz.Page) -> int:
-    """Extract the printed page number from the running header; fallback to PDF index."""
-    d = page.get_text("dict", sort=True)
+def _printed_page_from_dict(d: Dict[str, Any], fallback: int) -> int:
+    """Printed page number from an already parsed page dict."""
     for block in d.get("blocks", []):
         if block.get("type", 0) != 0:
             continue
@@ -86,19 +95,24 @@ def get_printed_page_number(page: fitz.Page) -> int:
         if m:
             return int(m.group(1))
     # Fallback if not found (shouldn’t happen for these pages)
-    return page.number + 1
+    return fallback
 
 
-def collect_text_blocks(page: fitz.Page) -> List[Dict[str, Any]]:
+def _blocks_from_dict(d: Dict[str, Any], page_height: float) -> List[Dict[str, Any]]:
     """
-    Return page text blocks with:
+    Return the text blocks of an already parsed page dict with:
         { "idx": int, "text": str, "max_size": float }
     """
-    d = page.get_text("dict", sort=True)
+    footer_y = page_height - FOOTER_MARGIN_PT
     blocks: List[Dict[str, Any]] = []
     for bi, block in enumerate(d.get("blocks", [])):
         if block.get("type", 0) != 0:
             continue
+        # Skip running header/footer blocks before building any strings; body text
+        # that merely reaches into a margin is kept
+        bbox = block.get("bbox")
+        if bbox and (bbox[3] <= HEADER_MARGIN_PT or bbox[1] >= footer_y):
+            continue
         raw = "".join(
             span.get("text", "")
             for line in block.get("lines", [])
@@ -147,19 +161,14 @@ def extract_json(
         cur_para = None
         buf = []
 
-    # Map from printed page → PDF index to iterate only desired range
-    printed_to_index: Dict[int, int] = {}
-    for i in range(doc.page_count):
-        pp = get_printed_page_number(doc.load_page(i))
-        printed_to_index[pp] = i
-
-    for printed_p in range(start_printed_page, end_printed_page + 1):
-        if printed_p not in printed_to_index:
-            # Some PDFs repeat headers in annexes differently; skip if not present
-            continue
-        pidx = printed_to_index[printed_p]
+    # Single pass: parse each page dict once, keep pages in the printed range
+    for pidx in range(doc.page_count):
         page = doc.load_page(pidx)
-        blocks = collect_text_blocks(page)
+        d = page.get_text("dict", sort=True)
+        printed_p = _printed_page_from_dict(d, pidx + 1)
+        if not (start_printed_page <= printed_p <= end_printed_page):
+            continue
+        blocks = _blocks_from_dict(d, page.rect.height)
 
         # Pass 1: detect big titles (20pt) for the page
         for b in blocks:
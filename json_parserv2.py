@@ -13,6 +13,7 @@ Output objects:
 
 Install:
     pip install pymupdf
+    pip install orjson   # optional, faster JSON output
 
 Run:
     python json_parser.py --pdf <input.pdf> --out <output.json> --start 5 --end 357
@@ -23,11 +24,19 @@ from __future__ import annotations
 import argparse
 import json
 import re
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
 
 import fitz  # PyMuPDF
 
+try:  # optional: C-accelerated encoder for the output file
+    import orjson
+except ImportError:  # fall back to json.dumps
+    orjson = None
+
 
 # ---------- Heuristics / Patterns ----------
 TITLE_MIN_PT = 18.0          # big chapter title size (e.g., 20pt)
@@ -37,18 +46,28 @@ FOOTNOTE_MAX_PT = 8.5        # tiny text → footnotes
 # Numbered paragraph like "1. ..."
 PARA_START_RE = re.compile(r"^\s*(\d+)\.\s+")
 
-# Headings
-SEC_NUM_RE         = re.compile(r"^\s*(\d+)\s+(.+)$")            # "1 Overarching principles …" (rarely printed as such)
-SEC_ALPHA_RE       = re.compile(r"^\s*([A-Z])\s+(.+)$")          # "A General topics for credit risk"
-SUBSEC_NUMDOT_RE   = re.compile(r"^\s*(\d+)\.(\d+)\s+(.+)$")     # "1.2 Guidelines …"
-SUBSEC_ALPHADOT_RE = re.compile(r"^\s*([A-Z])\.(\d+)\s+(.+)$")   # "A.1 Scope …"
+# Headings: one alternation, subsections before plain sections
+HEADING_RE = re.compile(
+    r"^\s*(?:"
+    r"(?P<sn>\d+)\.\d+\s+.+"        # "1.2 Guidelines …"
+    r"|(?P<an>[A-Z])\.\d+\s+.+"     # "A.1 Scope …"
+    r"|(?P<s>\d+)\s+.+"             # "1 Overarching principles …" (rarely printed as such)
+    r"|(?P<a>[A-Z])\s+.+"            # "A General topics for credit risk"
+    r")$"
+)
 
 # Header/footer handling
 HEADER_NUM_RE   = re.compile(r"ECB guide to internal models\s+–\s+.*?\s+(\d+)\s*$")
 HEADER_STRIP_RE = re.compile(r"ECB guide to internal models\s+–\s+.*?\s+\d+\s*")
+HEADER_EDGE_BLOCKS = 3      # blocks at each end of the sorted page searched for the page number
+WS_RE           = re.compile(r"\s+")
 
 TABLE_HEADING_PREFIXES = ("Table ", "Relevant regulatory references")
 
+# "dict" extraction without image blocks (TEXTFLAGS_DICT minus TEXT_PRESERVE_IMAGES);
+# ligatures stay preserved so the extracted text is unchanged
+DICT_FLAGS = fitz.TEXTFLAGS_TEXT
+
 
 # ---------- Helpers ----------
 def normalize_text(s: str) -> str:
@@ -56,15 +75,15 @@ def normalize_text(s: str) -> str:
     s = s.replace("-\n", "")         # hyphenated line break
     s = s.replace("\n", " ")
     s = HEADER_STRIP_RE.sub(" ", s)  # remove header/footer remnants
-    s = re.sub(r"\s+", " ", s).strip()
+    s = WS_RE.sub(" ", s).strip()
     return s
 
 
-def get_printed_page_number(page: fitz.Page) -> int:
-    d = page.get_text("dict", sort=True)
-    for block in d.get("blocks", []):
-        if block.get("type", 0) != 0:
-            continue
+def get_printed_page_number(blocks: List[Dict[str, Any]]) -> int | None:
+    # Blocks are sorted top-to-bottom, so the footer is among the last few and the
+    # header among the first few; check those instead of every block on the page
+    n = HEADER_EDGE_BLOCKS
+    for block in (*reversed(blocks[-n:]), *blocks[:n]):
         raw = "".join(
             span.get("text", "")
             for line in block.get("lines", [])
@@ -73,47 +92,103 @@ def get_printed_page_number(page: fitz.Page) -> int:
         m = HEADER_NUM_RE.search(raw)
         if m:
             return int(m.group(1))
-    return page.number + 1
+    return None  # no running header (cover, divider, blank page)
 
 
-def collect_blocks(page: fitz.Page) -> List[Dict[str, Any]]:
-    d = page.get_text("dict", sort=True)
-    blocks: List[Dict[str, Any]] = []
-    for bi, block in enumerate(d.get("blocks", [])):
+def collect_blocks(blocks: List[Dict[str, Any]]) -> Tuple[List[str], array]:
+    """Page "dict" blocks -> (normalized block texts, max font size per block)."""
+    texts: List[str] = []
+    sizes = array("d")  # parallel to texts; float64 keeps threshold comparisons exact
+    for block in blocks:
         if block.get("type", 0) != 0:
             continue
-        raw = "".join(
-            span.get("text", "")
-            for line in block.get("lines", [])
-            for span in line.get("spans", [])
-        )
-        txt = normalize_text(raw)
+        # One walk over the spans: collect text and the largest font size
+        parts: List[str] = []
+        mx = 0.0
+        for line in block.get("lines", []):
+            for span in line.get("spans", []):
+                parts.append(span.get("text", ""))
+                sz = span.get("size", 0.0)
+                if sz > mx:
+                    mx = sz
+        txt = normalize_text("".join(parts))
         if not txt:
             continue
-        sizes = [
-            span.get("size", 0.0)
-            for line in block.get("lines", [])
-            for span in line.get("spans", [])
-        ]
-        max_size = max(sizes) if sizes else 0.0
-        blocks.append({"idx": bi, "text": txt, "max_size": max_size})
-    return blocks
+        texts.append(txt)
+        sizes.append(mx)
+    return texts, sizes
+
+
+def match_heading(text: str) -> Tuple[str, bool] | None:
+    """(chapter id, is plain section) for a section/subsection heading, else None."""
+    c0 = text[:1]
+    if not (c0.isdigit() or "A" <= c0 <= "Z"):
+        return None  # headings start with a digit or an ASCII capital
+    m = HEADING_RE.match(text)
+    if m is None:
+        return None
+    sec = m["s"] or m["a"]
+    return (sec, True) if sec else (m["sn"] or m["an"], False)
+
+
+def dump_para(para: Dict[str, Any]) -> bytes:
+    """Encode one paragraph object as indent=2 UTF-8 JSON (orjson when available)."""
+    if orjson is not None:
+        return orjson.dumps(para, option=orjson.OPT_INDENT_2)
+    return json.dumps(para, ensure_ascii=False, indent=2).encode("utf-8")
 
 
 def looks_like_table_heading(text: str) -> bool:
-    return any(text.startswith(pfx) for pfx in TABLE_HEADING_PREFIXES)
+    return text.startswith(TABLE_HEADING_PREFIXES)
+
+
+# ---------- Page extraction (process pool) ----------
+_worker_doc: fitz.Document | None = None  # set in each pool worker by init_worker()
+
+
+def parse_page(page: fitz.Page) -> Tuple[int | None, List[str], array]:
+    """(printed page number or None, block texts, block sizes) for one page."""
+    blocks = page.get_text("dict", flags=DICT_FLAGS, sort=True).get("blocks", [])
+    texts, sizes = collect_blocks(blocks)
+    return get_printed_page_number(blocks), texts, sizes
+
+
+def init_worker(pdf_path: str) -> None:
+    """Pool initializer: each worker process opens the PDF once for all its pages."""
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)
+
+
+def parse_worker_page(pidx: int) -> Tuple[int | None, List[str], array]:
+    """Pool task: parse_page() on the worker's own document."""
+    return parse_page(_worker_doc.load_page(pidx))
+
+
+def iter_pages(pdf_path: Path, workers: int | None = None) -> Iterator[Tuple[int | None, List[str], array]]:
+    """Yield parse_page() results in page order; pages are extracted in parallel."""
+    path = str(pdf_path)
+    with fitz.open(path) as doc:
+        if workers == 1:
+            for page in doc:
+                yield parse_page(page)
+            return
+        page_count = doc.page_count
+    ex = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(path,))
+    try:
+        yield from ex.map(parse_worker_page, range(page_count), chunksize=4)
+    finally:
+        # The caller stops early once past the end page; drop the queued pages
+        ex.shutdown(cancel_futures=True)
 
 
 # ---------- Core extraction ----------
-def extract_json(
+def iter_paragraphs(
     pdf_path: Path,
-    out_path: Path,
     start_printed_page: int = 5,
     end_printed_page: int = 357,
-) -> List[Dict[str, Any]]:
-    doc = fitz.open(pdf_path)
-
-    results: List[Dict[str, Any]] = []
+    workers: int | None = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield paragraph objects in PDF order as soon as each one is complete."""
 
     # Current context
     current_title: str | None = None            # big chapter title (20pt)
@@ -121,102 +196,84 @@ def extract_json(
     current_subsection: str = "N/A"            # "1.2 Guidelines …" or "A.1 …"
     current_chapter_id: str | None = None      # "1" or "A" (derived from headings)
 
+    # Open paragraph; its "text" collects block pieces until flush() joins them
     cur_para: Dict[str, Any] | None = None
-    buf: List[str] = []
 
-    def flush():
-        nonlocal cur_para, buf
+    def flush() -> Dict[str, Any] | None:
+        """Close the open paragraph; return it if it ended up with any text."""
+        nonlocal cur_para
+        done = None
         if cur_para is not None:
-            text = normalize_text(" ".join(buf))
+            # Pieces already went through normalize_text in collect_blocks; only re-collapse spaces
+            text = WS_RE.sub(" ", " ".join(cur_para["text"])).strip()
             if text:
                 cur_para["text"] = text
-                results.append(cur_para)
+                done = cur_para
         cur_para = None
-        buf = []
-
-    # Map printed page → pdf index to iterate only desired range
-    printed_to_index = {}
-    for i in range(doc.page_count):
-        printed_to_index[get_printed_page_number(doc.load_page(i))] = i
-
-    for printed_p in range(start_printed_page, end_printed_page + 1):
-        if printed_p not in printed_to_index:
+        return done
+
+    # Locals for the per-block loops below (saves a global lookup per use)
+    title_min, heading_min, footnote_max = TITLE_MIN_PT, HEADING_MIN_PT, FOOTNOTE_MAX_PT
+    heading, para_start, table_heading = match_heading, PARA_START_RE.match, looks_like_table_heading
+
+    # Single pass in PDF order; stop once past the last wanted printed page
+    # (page extraction runs in worker processes; section state is tracked here, in order)
+    in_range_seen = False
+    for pidx, (header_p, texts, sizes) in enumerate(iter_pages(pdf_path, workers)):
+        # Pages without a running header fall back to their physical position
+        printed_p = header_p if header_p is not None else pidx + 1
+        if printed_p < start_printed_page:
+            continue
+        if printed_p > end_printed_page:
+            # Only a real header number ends the run: a headerless page (TOC,
+            # divider, blank) can fall back past the end before the last pages
+            if in_range_seen and header_p is not None:
+                break
             continue
-        pidx = printed_to_index[printed_p]
-        page = doc.load_page(pidx)
-        blocks = collect_blocks(page)
+        in_range_seen = True
 
         # Pass A: detect big chapter titles (>= TITLE_MIN_PT)
-        for b in blocks:
-            if b["max_size"] >= TITLE_MIN_PT and len(b["text"]) < 200 and b["text"].lower() != "contents":
-                current_title = b["text"]
+        for txt, sz in zip(texts, sizes):
+            if sz >= title_min and len(txt) < 200 and txt.lower() != "contents":
+                current_title = sys.intern(txt)
                 # Reset section/subsection until we see numbered/lettered headings
                 current_section = "N/A"
                 current_subsection = "N/A"
                 current_chapter_id = None
 
         # Pass B: detect section/subsection headings in reading order
-        for b in blocks:
-            if b["max_size"] < HEADING_MIN_PT:
+        for txt, sz in zip(texts, sizes):
+            if sz < heading_min:
                 continue
 
-            txt = b["text"]
-
-            # Subsections first (1.2 ..., A.1 ...)
-            m = SUBSEC_NUMDOT_RE.match(txt)
-            if m:
-                current_chapter_id = m.group(1)  # "1"
+            h = heading(txt)
+            if h:
+                current_chapter_id = h[0]  # "1" or "A"
                 # Section label is "<chapter> <title>" once we know the chapter id
-                if current_title:
-                    current_section = f"{current_chapter_id} {current_title}"
-                else:
-                    current_section = current_chapter_id or "N/A"
-                current_subsection = txt
-                continue
-
-            m = SUBSEC_ALPHADOT_RE.match(txt)
-            if m:
-                current_chapter_id = m.group(1)  # "A"
-                current_section = f"{current_chapter_id} {current_title}" if current_title else current_chapter_id
-                current_subsection = txt
-                continue
-
-            # Then plain sections (1 ..., A ...)
-            m = SEC_NUM_RE.match(txt)
-            if m:
-                current_chapter_id = m.group(1)  # "1"
-                current_section = f"{current_chapter_id} {current_title}" if current_title else current_chapter_id
-                # If the document uses only "1 <heading>" (no dot level), treat it as subsection label too
-                current_subsection = txt
-                continue
-
-            m = SEC_ALPHA_RE.match(txt)
-            if m:
-                current_chapter_id = m.group(1)  # "A"
-                current_section = f"{current_chapter_id} {current_title}" if current_title else current_chapter_id
-                current_subsection = txt
-                continue
+                current_section = sys.intern(f"{current_chapter_id} {current_title}") if current_title else current_chapter_id
+                # For plain "1 <heading>" / "A <heading>" (no dot level) this is the subsection label too
+                current_subsection = sys.intern(txt)
 
         # Pass C: numbered paragraphs
-        for b in blocks:
+        for txt, sz in zip(texts, sizes):
             # Skip small footnotes
-            if b["max_size"] < FOOTNOTE_MAX_PT:
+            if sz < footnote_max:
                 continue
 
-            txt = b["text"]
             # Skip headings and table headings
             if (
-                (b["max_size"] >= HEADING_MIN_PT and (
-                    SUBSEC_NUMDOT_RE.match(txt) or SUBSEC_ALPHADOT_RE.match(txt) or
-                    SEC_NUM_RE.match(txt) or SEC_ALPHA_RE.match(txt)
-                ))
-                or looks_like_table_heading(txt)
+                (sz >= heading_min and heading(txt))
+                or table_heading(txt)
             ):
                 continue
 
-            m = PARA_START_RE.match(txt)
+            # Numbered paragraph like "1. ..." (block texts are stripped, so the
+            # number is the first character; skip the regex for everything else)
+            m = para_start(txt) if txt[:1].isdigit() else None
             if m:
-                flush()
+                done = flush()
+                if done:
+                    yield done
                 para_no = m.group(1)
                 rest = txt[m.end():].strip()
                 cur_para = {
@@ -225,20 +282,36 @@ def extract_json(
                     "subsection": current_subsection or "N/A",
                     "paragraph_number": para_no,
                     "page": printed_p,
-                    "text": "",
+                    "text": [rest] if rest else [],
                 }
-                if rest:
-                    buf.append(rest)
             else:
                 if cur_para is not None:
-                    buf.append(txt)
+                    cur_para["text"].append(txt)
 
-    flush()
+    done = flush()
+    if done:
+        yield done
 
+
+def extract_json(
+    pdf_path: Path,
+    out_path: Path,
+    start_printed_page: int = 5,
+    end_printed_page: int = 357,
+    workers: int | None = None,
+) -> int:
+    """Stream paragraphs into a JSON array at out_path; return how many were written."""
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
-    return results
+    count = 0
+    with out_path.open("wb") as f:
+        f.write(b"[")
+        for para in iter_paragraphs(pdf_path, start_printed_page, end_printed_page, workers):
+            # Same layout json.dump(indent=2) gives for the whole list
+            f.write(b",\n  " if count else b"\n  ")
+            f.write(dump_para(para).replace(b"\n", b"\n  "))
+            count += 1
+        f.write(b"\n]" if count else b"]")
+    return count
 
 
 # ---------- CLI ----------
@@ -248,10 +321,11 @@ def main():
     ap.add_argument("--out", required=True, type=Path, help="Path to write the JSON.")
     ap.add_argument("--start", type=int, default=5, help="Printed page to start (default: 5).")
     ap.add_argument("--end", type=int, default=357, help="Printed page to end (default: 357).")
+    ap.add_argument("--workers", type=int, default=None, help="Page-extraction processes (default: CPU count; 1 = no pool).")
     args = ap.parse_args()
 
-    _ = extract_json(args.pdf, args.out, start_printed_page=args.start, end_printed_page=args.end)
-    print(f"Wrote JSON to: {args.out}")
+    n = extract_json(args.pdf, args.out, start_printed_page=args.start, end_printed_page=args.end, workers=args.workers)
+    print(f"Wrote {n} paragraphs to: {args.out}")
 
 if __name__ == "__main__":
     main()
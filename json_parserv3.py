@@ -13,17 +13,25 @@ Output objects:
 
 Install:
     pip install pymupdf
+    pip install orjson   # optional, faster JSON output
 
 Run:
     python json_parser.py --pdf <input.pdf> --out <output.json> --start 5 --end 357
 """
 
 from __future__ import annotations
-import argparse, json, re
+import argparse, json, re, sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
 import fitz  # PyMuPDF
 
+try:  # optional: C-accelerated encoder for the output file
+    import orjson
+except ImportError:  # fall back to json.dumps
+    orjson = None
+
 # --- Heuristics / Patterns ---
 TITLE_MIN_PT   = 18.0   # big chapter titles (e.g., 20pt)
 HEADING_MIN_PT = 12.5   # section/subsection headings (e.g., 14pt)
@@ -32,60 +40,107 @@ FOOTNOTE_MAX_PT = 8.5   # tiny text → footnotes
 # Numbered paragraph like "1. ..."
 PARA_START_RE = re.compile(r"^\s*(\d+)\.\s+")
 
-# Headings
-SUBSEC_NUMDOT_RE   = re.compile(r"^\s*(\d+)\.(\d+)\s+(.+)$")   # "1.2 Guidelines …"
-SUBSEC_ALPHADOT_RE = re.compile(r"^\s*([A-Z])\.(\d+)\s+(.+)$") # "A.1 Scope …"
-SEC_NUM_RE         = re.compile(r"^\s*(\d+)\s+(.+)$")          # "1 Overarching principles …"
-SEC_ALPHA_RE       = re.compile(r"^\s*([A-Z])\s+(.+)$")        # "A Credit risk"
+# Headings: one alternation, subsections before plain sections
+HEADING_RE = re.compile(
+    r"^\s*(?:(?P<sn>\d+)\.\d+\s+.+"   # "1.2 Guidelines …"
+    r"|(?P<an>[A-Z])\.\d+\s+.+"        # "A.1 Scope …"
+    r"|(?P<s>\d+)\s+.+"                # "1 Overarching principles …"
+    r"|(?P<a>[A-Z])\s+.+)$"             # "A Credit risk"
+)
 
 # Header/footer handling
 HEADER_NUM_RE   = re.compile(r"ECB guide to internal models\s+–\s+.*?\s+(\d+)\s*$")
 HEADER_STRIP_RE = re.compile(r"ECB guide to internal models\s+–\s+.*?\s+\d+\s*")
+HEADER_EDGE_BLOCKS = 3  # blocks at each end of the sorted page searched for the page number
+WS_RE           = re.compile(r"\s+")
 
 TABLE_HEADING_PREFIXES = ("Table ", "Relevant regulatory references")
+DICT_FLAGS = fitz.TEXTFLAGS_TEXT  # "dict" minus image blocks; ligatures kept so text is unchanged
 
 def normalize_text(s: str) -> str:
     s = s.replace("\u00ad", "").replace("-\n", "").replace("\n", " ")
     s = HEADER_STRIP_RE.sub(" ", s)
-    s = re.sub(r"\s+", " ", s).strip()
+    s = WS_RE.sub(" ", s).strip()
     return s
 
-def get_printed_page_number(page: fitz.Page) -> int:
-    d = page.get_text("dict", sort=True)
-    for block in d.get("blocks", []):
-        if block.get("type", 0) != 0:
-            continue
+def get_printed_page_number(blocks: List[Dict[str, Any]]) -> int | None:
+    # Sorted blocks: footer is among the last few, header among the first few
+    n = HEADER_EDGE_BLOCKS
+    for block in (*reversed(blocks[-n:]), *blocks[:n]):
         raw = "".join(span.get("text", "") for line in block.get("lines", []) for span in line.get("spans", []))
         m = HEADER_NUM_RE.search(raw)
         if m: return int(m.group(1))
-    return page.number + 1
+    return None  # no running header (cover, divider, blank page)
 
-def collect_blocks(page: fitz.Page) -> List[Dict[str, Any]]:
-    d = page.get_text("dict", sort=True)
-    blocks: List[Dict[str, Any]] = []
-    for bi, block in enumerate(d.get("blocks", [])):
+def collect_blocks(blocks: List[Dict[str, Any]]) -> Tuple[List[str], array]:
+    """Page "dict" blocks -> (normalized block texts, max font size per block)."""
+    texts: List[str] = []
+    sizes = array("d")  # parallel to texts; float64 keeps threshold comparisons exact
+    for block in blocks:
         if block.get("type", 0) != 0:
             continue
-        raw = "".join(span.get("text", "") for line in block.get("lines", []) for span in line.get("spans", []))
-        txt = normalize_text(raw)
+        parts: List[str] = []
+        mx = 0.0
+        for line in block.get("lines", []):  # one walk: span text + largest font size
+            for span in line.get("spans", []):
+                parts.append(span.get("text", ""))
+                sz = span.get("size", 0.0)
+                if sz > mx: mx = sz
+        txt = normalize_text("".join(parts))
         if not txt: continue
-        sizes = [span.get("size", 0.0) for line in block.get("lines", []) for span in line.get("spans", [])]
-        max_size = max(sizes) if sizes else 0.0
-        blocks.append({"idx": bi, "text": txt, "max_size": max_size})
-    return blocks
+        texts.append(txt)
+        sizes.append(mx)
+    return texts, sizes
+
+def match_heading(text: str) -> Tuple[str, bool] | None:
+    """(chapter id, is plain section) for a section/subsection heading, else None."""
+    c0 = text[:1]
+    if not (c0.isdigit() or "A" <= c0 <= "Z"): return None  # headings start with a digit or an ASCII capital
+    m = HEADING_RE.match(text)
+    if m is None: return None
+    sec = m["s"] or m["a"]
+    return (sec, True) if sec else (m["sn"] or m["an"], False)
+
+def dump_para(para: Dict[str, Any]) -> bytes:
+    # indent=2 UTF-8 JSON; orjson when installed, else the stdlib encoder
+    if orjson is not None: return orjson.dumps(para, option=orjson.OPT_INDENT_2)
+    return json.dumps(para, ensure_ascii=False, indent=2).encode("utf-8")
 
 def looks_like_table_heading(text: str) -> bool:
-    return any(text.startswith(pfx) for pfx in TABLE_HEADING_PREFIXES)
-
-def extract_json(pdf_path: Path, out_path: Path, start_printed_page: int = 5, end_printed_page: int = 357):
-    doc = fitz.open(pdf_path)
-
-    # printed page -> pdf index
-    printed_to_index = {}
-    for i in range(doc.page_count):
-        printed_to_index[get_printed_page_number(doc.load_page(i))] = i
-
-    results: List[Dict[str, Any]] = []
+    return text.startswith(TABLE_HEADING_PREFIXES)
+
+# ---- Page extraction (process pool) ----
+_worker_doc: fitz.Document | None = None  # set in each pool worker by init_worker()
+
+def parse_page(page: fitz.Page) -> Tuple[int | None, List[str], array]:
+    blocks = page.get_text("dict", flags=DICT_FLAGS, sort=True).get("blocks", [])
+    texts, sizes = collect_blocks(blocks)
+    return get_printed_page_number(blocks), texts, sizes
+
+def init_worker(pdf_path: str) -> None:
+    global _worker_doc
+    _worker_doc = fitz.open(pdf_path)  # once per worker process, reused for all its pages
+
+def parse_worker_page(pidx: int) -> Tuple[int | None, List[str], array]:
+    return parse_page(_worker_doc.load_page(pidx))
+
+def iter_pages(pdf_path: Path, workers: int | None = None) -> Iterator[Tuple[int | None, List[str], array]]:
+    # parse_page() results in page order; extraction itself runs in parallel
+    path = str(pdf_path)
+    with fitz.open(path) as doc:
+        if workers == 1:
+            for page in doc:
+                yield parse_page(page)
+            return
+        page_count = doc.page_count
+    ex = ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(path,))
+    try:
+        yield from ex.map(parse_worker_page, range(page_count), chunksize=4)
+    finally:
+        ex.shutdown(cancel_futures=True)  # caller stops early past the end page
+
+def iter_paragraphs(pdf_path: Path, start_printed_page: int = 5, end_printed_page: int = 357, workers: int | None = None) -> Iterator[Dict[str, Any]]:
+    # Paragraph objects in PDF order, each yielded as soon as it is complete
 
     # Current context (updated in reading order)
     title: str | None = None
@@ -93,99 +148,95 @@ def extract_json(pdf_path: Path, out_path: Path, start_printed_page: int = 5, en
     subsection: str = "N/A"
     chapter_id: str | None = None
 
-    cur_para: Dict[str, Any] | None = None
-    buf: List[str] = []
+    cur_para: Dict[str, Any] | None = None  # "text" holds the block pieces until flush()
 
-    def flush():
-        nonlocal cur_para, buf
+    def flush() -> Dict[str, Any] | None:
+        nonlocal cur_para
+        done = None
         if cur_para is not None:
-            t = normalize_text(" ".join(buf))
+            t = WS_RE.sub(" ", " ".join(cur_para["text"])).strip()  # pieces are already normalized per block
             if t:
                 cur_para["text"] = t
-                results.append(cur_para)
+                done = cur_para
         cur_para = None
-        buf = []
+        return done
+
+    # Locals for the per-block loop (saves a global lookup per use)
+    title_min, heading_min, footnote_max = TITLE_MIN_PT, HEADING_MIN_PT, FOOTNOTE_MAX_PT
+    heading, para_start, table_heading = match_heading, PARA_START_RE.match, looks_like_table_heading
 
-    for printed in range(start_printed_page, end_printed_page + 1):
-        if printed not in printed_to_index:
+    # Single pass in PDF order; stop once past the last wanted printed page
+    in_range_seen = False
+    for pidx, (header_p, texts, sizes) in enumerate(iter_pages(pdf_path, workers)):
+        printed = header_p if header_p is not None else pidx + 1  # headerless pages: physical position
+        if printed < start_printed_page:
+            continue
+        if printed > end_printed_page:
+            # Stop only on a real header number; a headerless fallback can overshoot before the last pages
+            if in_range_seen and header_p is not None: break
             continue
-        page = doc.load_page(printed_to_index[printed])
-        blocks = collect_blocks(page)
+        in_range_seen = True
 
         # *** Single pass in reading order ***
-        for b in blocks:
-            txt, sz = b["text"], b["max_size"]
+        for txt, sz in zip(texts, sizes):
 
             # Big chapter titles
-            if sz >= TITLE_MIN_PT and len(txt) < 200 and txt.lower() != "contents":
-                title = txt
+            if sz >= title_min and len(txt) < 200 and txt.lower() != "contents":
+                title = sys.intern(txt)
                 section = "N/A"
                 subsection = "N/A"
                 chapter_id = None
                 continue
 
             # Section / Subsection headings
-            if sz >= HEADING_MIN_PT:
-                m = SUBSEC_NUMDOT_RE.match(txt)
-                if m:
-                    chapter_id = m.group(1)
-                    # If you want section WITHOUT the leading number, replace next line with: section = title or "N/A"
-                    # section = f"{chapter_id} {title}" if title else chapter_id or "N/A"
+            if sz >= heading_min:
+                h = heading(txt)
+                # Plain "1 …" / "A …" sections need more than two words to count
+                if h and not (h[1] and len(txt.split()) <= 2):
+                    chapter_id = h[0]
+                    # If you want section WITH the leading number: section = f"{chapter_id} {title}" if title else chapter_id or "N/A"
                     section = title or "N/A"
-                    subsection = txt
-                    continue
-
-                m = SUBSEC_ALPHADOT_RE.match(txt)
-                if m:
-                    chapter_id = m.group(1)
-                    # section = f"{chapter_id} {title}" if title else chapter_id or "N/A"
-                    section = title or "N/A"
-                    subsection = txt
-                    continue
-
-                m = SEC_NUM_RE.match(txt)
-                if m and len(txt.split()) > 2:
-                    chapter_id = m.group(1)
-                    # section = f"{chapter_id} {title}" if title else chapter_id or "N/A"
-                    section = title or "N/A"
-                    subsection = txt
-                    continue
-
-                m = SEC_ALPHA_RE.match(txt)
-                if m and len(txt.split()) > 2:
-                    chapter_id = m.group(1)
-                    # section = f"{chapter_id} {title}" if title else chapter_id or "N/A"
-                    section = title or "N/A"
-                    subsection = txt
+                    subsection = sys.intern(txt)
                     continue
 
             # Skip tiny footnotes and table headings
-            if sz < FOOTNOTE_MAX_PT or looks_like_table_heading(txt):
+            if sz < footnote_max or table_heading(txt):
                 continue
 
             # Numbered paragraphs
-            m = PARA_START_RE.match(txt)
+            m = para_start(txt) if txt[:1].isdigit() else None  # texts are stripped: number comes first
             if m:
-                flush()
+                done = flush()
+                if done: yield done
+                para_no = m.group(1)
+                rest = txt[m.end():].strip()
                 cur_para = {
                     "title": title or "N/A",
                     "section": section or "N/A",
                     "subsection": subsection or "N/A",
-                    "paragraph_number": m.group(1),
+                    "paragraph_number": para_no,
                     "page": printed,
-                    "text": ""
+                    "text": [rest] if rest else []
                 }
-                rest = txt[m.end():].strip()
-                if rest: buf.append(rest)
             else:
                 if cur_para is not None:
-                    buf.append(txt)
+                    cur_para["text"].append(txt)
+
+    done = flush()
+    if done: yield done
 
-    flush()
+def extract_json(pdf_path: Path, out_path: Path, start_printed_page: int = 5, end_printed_page: int = 357, workers: int | None = None) -> int:
+    # Stream the array out paragraph by paragraph (same layout as json.dump(indent=2))
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    with out_path.open("w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
-    return results
+    n = 0
+    with out_path.open("wb") as f:
+        f.write(b"[")
+        for para in iter_paragraphs(pdf_path, start_printed_page, end_printed_page, workers):
+            f.write(b",\n  " if n else b"\n  ")
+            f.write(dump_para(para).replace(b"\n", b"\n  "))
+            n += 1
+        f.write(b"\n]" if n else b"]")
+    return n
 
 # ---- CLI ----
 def main():
@@ -194,10 +245,11 @@ def main():
     ap.add_argument("--out", required=True, type=Path, help="Path to write the JSON.")
     ap.add_argument("--start", type=int, default=5, help="Printed page to start (default: 5).")
     ap.add_argument("--end", type=int, default=357, help="Printed page to end (default: 357).")
+    ap.add_argument("--workers", type=int, default=None, help="Page-extraction processes (default: CPU count; 1 = no pool).")
     args = ap.parse_args()
 
-    _ = extract_json(args.pdf, args.out, start_printed_page=args.start, end_printed_page=args.end)
-    print(f"Wrote JSON to: {args.out}")
+    n = extract_json(args.pdf, args.out, start_printed_page=args.start, end_printed_page=args.end, workers=args.workers)
+    print(f"Wrote {n} paragraphs to: {args.out}")
 
 if __name__ == "__main__":
     main()